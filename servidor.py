@@ -1,11 +1,18 @@
-from flask import Flask, request, jsonify, render_template_string, session
+from flask import Flask, request, jsonify, render_template_string, session, g
+from flask.ctx import RequestContext
+from flask.globals import request_ctx
+from werkzeug.exceptions import InternalServerError
+from werkzeug.test import EnvironBuilder
+from urllib.parse import urlsplit
 import sqlite3
 import hashlib
 import secrets
+import sys
 from functools import wraps
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)  
+app.config['MAX_SOLICITUDES_LOTE'] = 20
 
 # Configuración de la base de datos
 DATABASE = 'tareas.db'
@@ -41,6 +48,24 @@ def init_db():
     conn.close()
     print("Base de datos inicializada correctamente")
 
+def obtener_db():
+    """Devuelve la conexión a la base de datos del contexto actual, creándola si no existe"""
+    if 'db' not in g:
+        g.db = sqlite3.connect(DATABASE)
+    return g.db
+
+def confirmar_cambios(conn):
+    """Confirma la transacción, salvo dentro de un lote transaccional"""
+    if not g.get('transaccion_lote'):
+        conn.commit()
+
+@app.teardown_appcontext
+def cerrar_db(exception):
+    """Cierra la conexión a la base de datos al terminar el contexto"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
+
 def hash_contraseña(contraseña):
     """Hashea una contraseña usando SHA-256 con salt"""
     salt = secrets.token_hex(16)
@@ -130,6 +155,21 @@ def home():
             <p><strong>Descripción:</strong> Cierra la sesión del usuario actual</p>
         </div>
 
+        <div class="endpoint">
+            <h3><span class="method">POST</span> /batch</h3>
+            <p><strong>Descripción:</strong> Ejecuta varias operaciones en una sola petición y devuelve los resultados en orden</p>
+            <p><strong>Parámetros:</strong></p>
+            <div class="example">
+                <pre>{
+    "transaccion": false,
+    "solicitudes": [
+        {"metodo": "POST", "ruta": "/login", "cuerpo": {"usuario": "nombre_usuario", "contraseña": "contraseña_segura"}},
+        {"metodo": "GET", "ruta": "/tareas"}
+    ]
+}</pre>
+            </div>
+        </div>
+
         <h2>🔧 Cómo probar la API</h2>
         <p>Puedes usar herramientas como <strong>Postman</strong>, <strong>curl</strong> o cualquier cliente HTTP para probar los endpoints.</p>
         
@@ -173,12 +213,11 @@ def registro():
         if len(contraseña) < 4:
             return jsonify({'error': 'La contraseña debe tener al menos 4 caracteres'}), 400
         
-        conn = sqlite3.connect(DATABASE)
+        conn = obtener_db()
         cursor = conn.cursor()
         
         cursor.execute('SELECT id FROM usuarios WHERE usuario = ?', (usuario,))
         if cursor.fetchone():
-            conn.close()
             return jsonify({'error': 'El usuario ya existe'}), 409
         
         contraseña_hash = hash_contraseña(contraseña)
@@ -188,9 +227,8 @@ def registro():
             (usuario, contraseña_hash)
         )
         
-        conn.commit()
+        confirmar_cambios(conn)
         usuario_id = cursor.lastrowid
-        conn.close()
         
         return jsonify({
             'mensaje': 'Usuario registrado exitosamente',
@@ -213,7 +251,7 @@ def login():
         usuario = data['usuario'].strip()
         contraseña = data['contraseña']
         
-        conn = sqlite3.connect(DATABASE)
+        conn = obtener_db()
         cursor = conn.cursor()
         
         cursor.execute(
@@ -221,7 +259,6 @@ def login():
             (usuario,)
         )
         resultado = cursor.fetchone()
-        conn.close()
         
         if not resultado:
             return jsonify({'error': 'Usuario no encontrado'}), 404
@@ -400,6 +437,108 @@ def tareas():
     
     return render_template_string(html_tareas)
 
+def ejecutar_subsolicitud(solicitud):
+    """Despacha una sub-solicitud del lote por la tabla de rutas de Flask, sin pasar por la red"""
+    if not isinstance(solicitud, dict) or not isinstance(solicitud.get('ruta'), str):
+        return {'status': 400, 'cuerpo': {'error': 'Cada solicitud debe incluir una ruta'}}
+
+    ruta = solicitud['ruta']
+    try:
+        partes = urlsplit(ruta)
+    except ValueError:
+        return {'status': 400, 'cuerpo': {'error': f'Ruta inválida: {ruta}'}}
+
+    # Solo se aceptan rutas locales ("/tareas"), nunca URLs absolutas
+    if partes.scheme or partes.netloc or not ruta.startswith('/'):
+        return {'status': 400, 'cuerpo': {'error': f'Ruta inválida: {ruta}'}}
+
+    metodo = str(solicitud.get('metodo', 'GET')).upper()
+    opciones = {'method': metodo, 'base_url': request.url_root}
+    if 'cuerpo' in solicitud:
+        opciones['json'] = solicitud['cuerpo']
+
+    try:
+        builder = EnvironBuilder(ruta, **opciones)
+        try:
+            environ = builder.get_environ()
+        finally:
+            builder.close()
+    except (ValueError, TypeError) as e:
+        return {'status': 400, 'cuerpo': {'error': f'Solicitud inválida: {str(e)}'}}
+
+    # Se reutiliza la sesión ya decodificada del lote en lugar de abrirla de nuevo
+    # (request_ctx y el parámetro session de RequestContext: Flask >= 2.2, < 3.2; ver requirements.txt)
+    ctx = RequestContext(app, environ, session=request_ctx.session)
+
+    with ctx:
+        if request.endpoint == 'lote':
+            return {'status': 400, 'cuerpo': {'error': 'No se permiten lotes anidados'}}
+        try:
+            respuesta = app.full_dispatch_request()
+        except Exception as e:
+            try:
+                respuesta = app.handle_exception(e)
+            except Exception:
+                # Única diferencia con una petición real: en modo debug Flask propaga la excepción,
+                # y dentro de un lote eso tumbaría el resto de operaciones
+                app.log_exception(sys.exc_info())
+                error = InternalServerError(original_exception=e)
+                respuesta = app.finalize_request(app.handle_http_exception(error), from_error_handler=True)
+
+    if respuesta.is_json:
+        cuerpo = respuesta.get_json()
+    else:
+        cuerpo = respuesta.get_data(as_text=True)
+    return {'status': respuesta.status_code, 'cuerpo': cuerpo}
+
+@app.route('/batch', methods=['POST'])
+def lote():
+    """Endpoint para ejecutar varias operaciones en una sola petición"""
+    data = request.get_json(silent=True)
+
+    if not isinstance(data, dict) or not isinstance(data.get('solicitudes'), list):
+        return jsonify({'error': 'Falta el campo requerido: solicitudes (lista)'}), 400
+
+    solicitudes = data['solicitudes']
+    max_solicitudes = app.config['MAX_SOLICITUDES_LOTE']
+
+    if len(solicitudes) > max_solicitudes:
+        return jsonify({'error': f'El lote admite como máximo {max_solicitudes} solicitudes'}), 413
+
+    transaccion = data.get('transaccion', False)
+    if not isinstance(transaccion, bool):
+        return jsonify({'error': 'El campo transaccion debe ser true o false'}), 400
+
+    sesion_original = dict(session)
+    g.transaccion_lote = transaccion
+
+    try:
+        resultados = []
+        for solicitud in solicitudes:
+            # Tras el primer fallo de un lote transaccional el rollback es seguro,
+            # así que no se ejecuta el resto para no retener el bloqueo de escritura
+            if transaccion and resultados and resultados[-1]['status'] >= 400:
+                resultados.append({'status': 424, 'cuerpo': {'error': 'No ejecutada: falló una operación anterior del lote'}})
+                continue
+            resultados.append(ejecutar_subsolicitud(solicitud))
+    finally:
+        g.transaccion_lote = False
+
+    # En modo transaccional los cambios se confirman solo si todas las operaciones tuvieron éxito;
+    # si no, se revierten tanto la base de datos como la sesión (p. ej. un login dentro del lote)
+    confirmado = True
+    if transaccion:
+        conn = obtener_db()
+        confirmado = all(resultado['status'] < 400 for resultado in resultados)
+        if confirmado:
+            conn.commit()
+        else:
+            conn.rollback()
+            session.clear()
+            session.update(sesion_original)
+
+    return jsonify({'confirmado': confirmado, 'resultados': resultados}), 200
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint no encontrado'}), 404
@@ -5,6 +5,7 @@ import sys
 
 # Configuración
 BASE_URL = "http://localhost:5000"
+MAX_SOLICITUDES_LOTE = 20  # Debe coincidir con app.config['MAX_SOLICITUDES_LOTE'] en servidor.py
 session = requests.Session()
 
 def print_separator():
@@ -150,6 +151,202 @@ def test_protected_routes():
         print("ERROR: No se pudo acceder a tareas")
         return False
 
+def test_batch():
+    """Prueba la ejecución de varias operaciones en un lote"""
+    print_test_header("Operaciones en Lote (POST /batch)")
+    
+    lote = {
+        "solicitudes": [
+            {"metodo": "GET", "ruta": "/tareas"},
+            {"metodo": "POST", "ruta": "/login", "cuerpo": {"usuario": "testuser1", "contraseña": "wrongpassword"}},
+            {"metodo": "GET", "ruta": "/noexiste"}
+        ]
+    }
+    
+    response = session.post(
+        f"{BASE_URL}/batch",
+        json=lote,
+        headers={"Content-Type": "application/json"}
+    )
+    print_response(response)
+    
+    if response.status_code != 200:
+        print(" ERROR: No se pudo ejecutar el lote")
+        return False
+    
+    estados = [resultado["status"] for resultado in response.json()["resultados"]]
+    if estados == [200, 401, 404]:
+        print("ÉXITO: Lote ejecutado con resultados en orden")
+        return True
+    else:
+        print(f" ERROR: Estados inesperados en el lote: {estados}")
+        return False
+
+def test_batch_login():
+    """Prueba que un login dentro del lote se aplica a las operaciones siguientes"""
+    print_test_header("Login dentro de un Lote (POST /batch)")
+    
+    sesion_lote = requests.Session()
+    lote = {
+        "solicitudes": [
+            {"metodo": "POST", "ruta": "/login", "cuerpo": {"usuario": "testuser1", "contraseña": "password123"}},
+            {"metodo": "GET", "ruta": "/tareas"}
+        ]
+    }
+    
+    response = sesion_lote.post(f"{BASE_URL}/batch", json=lote)
+    print_response(response)
+    
+    estados = [resultado["status"] for resultado in response.json()["resultados"]]
+    if estados != [200, 200]:
+        print(f" ERROR: Estados inesperados en el lote: {estados}")
+        return False
+    
+    # La sesión iniciada en el lote debe seguir activa fuera de él
+    response = sesion_lote.get(f"{BASE_URL}/tareas")
+    if response.status_code == 200:
+        print("ÉXITO: El login del lote se aplicó a las operaciones siguientes")
+        return True
+    else:
+        print(" ERROR: La sesión del lote no quedó iniciada")
+        return False
+
+def test_batch_transaccion_confirmada():
+    """Prueba que un lote transaccional exitoso guarda los cambios"""
+    print_test_header("Lote Transaccional Confirmado (POST /batch)")
+    
+    usuario = f"lote_ok_{int(time.time())}"
+    lote = {
+        "transaccion": True,
+        "solicitudes": [
+            {"metodo": "POST", "ruta": "/registro", "cuerpo": {"usuario": usuario, "contraseña": "1234"}},
+            {"metodo": "GET", "ruta": "/"}
+        ]
+    }
+    
+    response = requests.post(f"{BASE_URL}/batch", json=lote)
+    print_response(response)
+    
+    if response.status_code != 200 or response.json().get("confirmado") is not True:
+        print(" ERROR: El lote no se confirmó")
+        return False
+    
+    # El usuario registrado en el lote debe existir
+    response = requests.post(f"{BASE_URL}/login", json={"usuario": usuario, "contraseña": "1234"})
+    if response.status_code == 200:
+        print("ÉXITO: Los cambios del lote transaccional se guardaron")
+        return True
+    else:
+        print(" ERROR: El usuario del lote no quedó registrado")
+        return False
+
+def test_batch_transaccion_revertida():
+    """Prueba que un lote transaccional fallido revierte la base de datos y la sesión"""
+    print_test_header("Lote Transaccional Revertido (POST /batch)")
+    
+    sesion_lote = requests.Session()
+    usuario = f"lote_rb_{int(time.time())}"
+    lote = {
+        "transaccion": True,
+        "solicitudes": [
+            {"metodo": "POST", "ruta": "/registro", "cuerpo": {"usuario": usuario, "contraseña": "1234"}},
+            {"metodo": "POST", "ruta": "/login", "cuerpo": {"usuario": usuario, "contraseña": "1234"}},
+            {"metodo": "POST", "ruta": "/registro", "cuerpo": {"usuario": "x", "contraseña": "1234"}},
+            {"metodo": "GET", "ruta": "/tareas"}
+        ]
+    }
+    
+    response = sesion_lote.post(f"{BASE_URL}/batch", json=lote)
+    print_response(response)
+    
+    passed = True
+    if response.status_code != 200 or response.json().get("confirmado") is not False:
+        print(" ERROR: El lote debía informar confirmado = false")
+        passed = False
+    
+    # Tras el primer fallo el resto de operaciones no se ejecuta
+    estados = [resultado["status"] for resultado in response.json()["resultados"]]
+    if estados != [201, 200, 400, 424]:
+        print(f" ERROR: Estados inesperados en el lote: {estados}")
+        passed = False
+    
+    # El usuario registrado en el lote no debe existir
+    response = sesion_lote.post(f"{BASE_URL}/login", json={"usuario": usuario, "contraseña": "1234"})
+    if response.status_code != 404:
+        print(" ERROR: El registro del lote no se revirtió")
+        passed = False
+    
+    # El login del lote tampoco debe haber quedado en la sesión
+    response = sesion_lote.get(f"{BASE_URL}/tareas")
+    if response.status_code != 401:
+        print(" ERROR: La sesión del lote no se revirtió")
+        passed = False
+    
+    if passed:
+        print("ÉXITO: Base de datos y sesión revertidas correctamente")
+    return passed
+
+def test_batch_limite():
+    """Prueba el límite de solicitudes por lote"""
+    print_test_header("Límite de Tamaño del Lote (POST /batch)")
+    
+    lote = {"solicitudes": [{"metodo": "GET", "ruta": "/"}] * (MAX_SOLICITUDES_LOTE + 1)}
+    
+    response = requests.post(f"{BASE_URL}/batch", json=lote)
+    print_response(response)
+    
+    if response.status_code == 413:
+        print("ÉXITO: Lote demasiado grande rechazado")
+        return True
+    else:
+        print(f" ERROR: El servidor aceptó un lote de {MAX_SOLICITUDES_LOTE + 1} solicitudes "
+              "(¿coincide MAX_SOLICITUDES_LOTE con la configuración de servidor.py?)")
+        return False
+
+def test_batch_invalidos():
+    """Prueba lotes anidados, solicitudes mal formadas y cuerpos inválidos"""
+    print_test_header("Solicitudes Inválidas en el Lote (POST /batch)")
+    
+    lote = {
+        "solicitudes": [
+            {"metodo": "POST", "ruta": "/batch", "cuerpo": {"solicitudes": []}},
+            "no_es_una_solicitud",
+            {"metodo": "GET"},
+            {"metodo": "GET", "ruta": "https://evil.example/tareas"},
+            {"metodo": "GET", "ruta": "http://[bad"},
+            {"metodo": "GET", "ruta": "/"}
+        ]
+    }
+    
+    response = requests.post(f"{BASE_URL}/batch", json=lote)
+    print_response(response)
+    
+    passed = True
+    estados = [resultado["status"] for resultado in response.json()["resultados"]]
+    if estados != [400, 400, 400, 400, 400, 200]:
+        print(f" ERROR: Estados inesperados en el lote: {estados}")
+        passed = False
+    
+    print("\n📦 Probando cuerpo que no es un objeto JSON")
+    response = requests.post(f"{BASE_URL}/batch", json=[1, 2])
+    print_response(response)
+    
+    if response.status_code != 400:
+        print(" ERROR: El servidor no rechazó el cuerpo inválido")
+        passed = False
+    
+    print("\n📦 Probando transaccion que no es booleano")
+    response = requests.post(f"{BASE_URL}/batch", json={"transaccion": "false", "solicitudes": []})
+    print_response(response)
+    
+    if response.status_code != 400:
+        print(" ERROR: El servidor aceptó un valor de transaccion no booleano")
+        passed = False
+    
+    if passed:
+        print("ÉXITO: Solicitudes inválidas rechazadas de forma individual")
+    return passed
+
 def test_logout():
     """Prueba el cierre de sesión"""
     print_test_header("Cierre de Sesión (POST /logout)")
@@ -192,6 +389,12 @@ def main():
         ("Login Exitoso", test_user_login),
         ("Fallas de Login", test_login_failures),
         ("Rutas Protegidas", test_protected_routes),
+        ("Operaciones en Lote", test_batch),
+        ("Login en Lote", test_batch_login),
+        ("Lote Transaccional Confirmado", test_batch_transaccion_confirmada),
+        ("Lote Transaccional Revertido", test_batch_transaccion_revertida),
+        ("Límite de Lote", test_batch_limite),
+        ("Lote con Solicitudes Inválidas", test_batch_invalidos),
         ("Logout", test_logout),
         ("Acceso No Autorizado", test_unauthorized_access)
     ]